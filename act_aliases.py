@@ -0,0 +1,146 @@
+import json
+import os
+import re
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Written at ingest; rebuilt from the input folder if missing
+ALIASES_PATH = os.path.join(current_dir, "act_aliases.json")
+INPUT_PATH = os.path.join(current_dir, "Legal_Chatbot_Inputs")
+
+# Common short forms that cannot be derived from the file name, keyed on the
+# base name aliases_for_file derives (parenthetical parts already removed)
+KNOWN_ABBREVIATIONS = {
+    "indian penal code": ["ipc"],
+    "code of criminal procedure": ["crpc", "cr pc", "criminal procedure code"],
+    "code of civil procedure": ["cpc", "civil procedure code"],
+    "constitution of india": ["constitution", "indian constitution"],
+    "right to information act": ["rti", "rti act"],
+    "negotiable instruments act": ["ni act"],
+    "juvenile justice act": ["jj act", "juvenile justice care and protection of children act"],
+    "hindu marriage act": ["hma"],
+}
+
+# Words dropped from the front of judgment file names, e.g. "Suprme-Court-Judgement_-..."
+CASE_NAME_PREFIXES = {"supreme", "suprme", "court", "judgement", "judgment", "sc"}
+STOPWORDS = {"the", "of", "and", "for", "to", "in", "on"}
+
+
+def normalize(text, keep_case=False):
+    """Lower-cases text, drops dots inside abbreviations and collapses punctuation."""
+    if not keep_case:
+        text = text.lower()
+    text = re.sub(r"[^A-Za-z0-9]+", " ", text.replace(".", ""))
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def aliases_for_file(fileName):
+    """Derives the names a user might use for the act or judgment in a file."""
+    stem = os.path.splitext(fileName)[0]
+    stem = re.sub(r"\(.*?\)", " ", stem)  # dates and court markers
+    name = normalize(stem)
+    words = name.split()
+
+    # Judgments: "<petitioner> vs <respondent>"
+    for separator in (" vs ", " v "):
+        if separator in f" {name} ":
+            petitioner, respondent = f" {name} ".split(separator, 1)
+            petitioner_words = petitioner.split()
+            while petitioner_words and petitioner_words[0] in CASE_NAME_PREFIXES:
+                petitioner_words.pop(0)
+            respondent = re.sub(r"\b(on )?\d.*$", "", respondent).strip()
+            petitioner = " ".join(petitioner_words)
+            aliases = {petitioner}
+            if respondent:
+                aliases.add(f"{petitioner} v {respondent}")
+                aliases.add(f"{petitioner} vs {respondent}")
+            return {alias for alias in aliases if len(alias.split()) >= 2}
+
+    # Acts and codes: "the <name> act, <year>"
+    if not {"act", "code", "constitution"} & set(words):
+        return set()
+    if words and words[0] == "the":
+        words = words[1:]
+    year = words[-1] if words and re.fullmatch(r"\d{4}", words[-1]) else None
+    if year:
+        words = words[:-1]
+    base = " ".join(words)
+    aliases = {base}
+    if year:
+        aliases.add(f"{base} {year}")
+    if words[0] == "indian" and len(words) > 2:
+        aliases.add(" ".join(words[1:]))
+    if words[-1] == "act":
+        # Kept upper-case: "it act" or "ie act" would otherwise match plain
+        # English, so the detector only matches these as written, e.g. "IT Act"
+        initials = "".join(word[0] for word in words[:-1] if word not in STOPWORDS)
+        if len(initials) >= 2:
+            aliases.add(f"{initials.upper()} act")
+    aliases.update(KNOWN_ABBREVIATIONS.get(base, []))
+    return aliases
+
+
+def build_alias_index(file_names):
+    """Maps every alias to the source file names it refers to."""
+    index = {}
+    for fileName in file_names:
+        for alias in aliases_for_file(fileName):
+            index.setdefault(alias, []).append(fileName)
+    return index
+
+
+def save_aliases(index, path=ALIASES_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+
+
+def load_aliases(path=ALIASES_PATH):
+    """Loads the alias index written at ingest, or builds it from the input folder."""
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    if os.path.isdir(INPUT_PATH):
+        return build_alias_index(sorted(os.listdir(INPUT_PATH)))
+    return {}
+
+
+def _alias_pattern(aliases, case_sensitive_words=False):
+    """Compiles aliases into one alternation, longest first so "indian penal code" wins over "penal code"."""
+    if not aliases:
+        return None
+
+    def word_pattern(word):
+        if case_sensitive_words and word.isupper():
+            return re.escape(word)
+        return f"(?i:{re.escape(word)})" if case_sensitive_words else re.escape(word)
+
+    alternatives = (" ".join(word_pattern(word) for word in alias.split()) for alias in aliases)
+    return re.compile(r"\b(" + "|".join(alternatives) + r")\b")
+
+
+class SourceDetector:
+    """
+    Finds the acts and judgments a query names, using the alias index.
+    Lower-case aliases match case-insensitively; aliases with upper-case
+    initials (generated "IT act" style short forms) only match when the query
+    writes those initials in capitals.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        by_length = sorted(index, key=len, reverse=True)
+        self.pattern = _alias_pattern([alias for alias in by_length if alias == alias.lower()])
+        # Keyed by lower-case form, since the trailing "act" matches in any case
+        self._initialisms = {alias.lower(): alias for alias in by_length if alias != alias.lower()}
+        self.initialism_pattern = _alias_pattern(list(self._initialisms.values()), case_sensitive_words=True)
+
+    def detect(self, query):
+        """Returns the sorted source file names named in the query."""
+        sources = set()
+        if self.pattern is not None:
+            for match in self.pattern.finditer(normalize(query)):
+                sources.update(self.index[match.group(1)])
+        if self.initialism_pattern is not None:
+            for match in self.initialism_pattern.finditer(normalize(query, keep_case=True)):
+                sources.update(self.index[self._initialisms[match.group(1).lower()]])
+        return sorted(sources)
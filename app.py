@@ -174,7 +174,7 @@ def show_chatbot():
         # Get and display bot reply
         with st.spinner("Thinking..."):
             previous_history = st.session_state["messages"][:-1]
-            bot_reply = ask_query(rag_chain, prompt, previous_history)
+            bot_reply = ask_query(rag_chain, prompt, previous_history, active_session_id)
 
         st.session_state["messages"].append({"role": "assistant", "content": bot_reply})
         add_message_to_history(active_session_id, "assistant", bot_reply)
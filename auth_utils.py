@@ -1,17 +1,14 @@
 import sqlite3
 import streamlit as st
 import os
-import hashlib
 import re
+from concurrent.futures import TimeoutError as HashTimeoutError
+from context_store import session_contexts
+from password_hashing import hash_password, verify_password, verify_unknown_user
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "users.db")
 
 
-def hash_password(password):
-    """Hashes a password using the SHA-256 algorithm."""
-    return hashlib.sha256(password.encode()).hexdigest()
-
-
 # Initialize database
 def init_db():
     conn = sqlite3.connect(DB_PATH)
@@ -53,9 +50,13 @@ def init_db():
 
 
 def add_user(first_name, last_name, email, password, profile_pic=None):
+    try:
+        hashed_password = hash_password(password)
+    except HashTimeoutError:
+        st.error("The server is busy. Please try again in a moment.")
+        return False
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    hashed_password = hash_password(password)
     try:
         cursor.execute(
             "INSERT INTO users (first_name, last_name, email, password, profile_pic) VALUES (?, ?, ?, ?, ?)",
@@ -72,16 +73,37 @@ def add_user(first_name, last_name, email, password, profile_pic=None):
 
 
 def get_user(email, password):
+    """
+    Looks the user up by email (the UNIQUE constraint indexes it) and verifies
+    the password in Python. Legacy SHA-256 hashes, and scrypt hashes made with
+    outdated parameters, are replaced with a fresh hash on successful sign-in.
+    """
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
-    hashed_password = hash_password(password)
-    cursor.execute(
-        "SELECT id, first_name, last_name, email, profile_pic FROM users WHERE email=? AND password=?",
-        (email, hashed_password),
-    )
-    result = cursor.fetchone()
-    conn.close()
-    return result
+    try:
+        cursor.execute(
+            "SELECT id, first_name, last_name, email, profile_pic, password FROM users WHERE email=?",
+            (email,),
+        )
+        row = cursor.fetchone()
+        if not row:
+            verify_unknown_user(password)
+            return None
+
+        matches, needs_rehash = verify_password(password, row[5])
+        if not matches:
+            return None
+        if needs_rehash:
+            # The password already verified, so a failed upgrade must not
+            # block sign-in; it is retried on the next one
+            try:
+                cursor.execute("UPDATE users SET password = ? WHERE id = ?", (hash_password(password), row[0]))
+                conn.commit()
+            except (sqlite3.Error, HashTimeoutError) as e:
+                print(f"Password rehash for user {row[0]} failed: {e!r}")
+        return row[:5]
+    finally:
+        conn.close()
 
 
 def is_password_valid(password):
@@ -108,7 +130,16 @@ def is_password_valid(password):
 
 
 def sign_in(email, password):
-    user = get_user(email, password)
+    try:
+        user = get_user(email, password)
+    except HashTimeoutError:
+        st.error("The server is busy. Please try again in a moment.")
+        return False
+    except ValueError:
+        # A stored hash that cannot be parsed; reported without revealing why
+        print(f"Malformed password hash for {email}")
+        st.error("Your account could not be verified. Please contact support.")
+        return False
     if not user:
         st.error("Invalid email or password.")
         return False
@@ -150,17 +181,17 @@ def sign_out():
 
 def update_user(user_id, first_name, last_name, password=None, profile_pic=None):
     """Updates a user's details in the database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
     query = "UPDATE users SET first_name = ?, last_name = ?"
     params = [first_name, last_name]
 
     if password:
         if not is_password_valid(password):
-            conn.close()
             return None
-        hashed_password = hash_password(password)
+        try:
+            hashed_password = hash_password(password)
+        except HashTimeoutError:
+            st.error("The server is busy. Please try again in a moment.")
+            return None
         query += ", password = ?"
         params.append(hashed_password)
 
@@ -171,6 +202,8 @@ def update_user(user_id, first_name, last_name, password=None, profile_pic=None)
     query += " WHERE id = ?"
     params.append(user_id)
 
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
     try:
         cursor.execute(query, tuple(params))
         conn.commit()
@@ -229,6 +262,7 @@ def delete_session(session_id):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM chat_sessions WHERE id = ?", (session_id,))
         conn.commit()
+        session_contexts.evict(session_id)
     except sqlite3.Error as e:
         st.error(f"Database error while deleting session: {e}")
     finally:
@@ -0,0 +1,103 @@
+import mmap
+import os
+import threading
+
+# Chunk text lives here instead of in the vector index metadata
+DOCSTORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "docstore")
+
+
+class ChunkDocstore:
+    """
+    Append-only store of chunk text, read through a memory map.
+
+    `chunks.bin` holds the UTF-8 text of every chunk back to back and
+    `offsets.tsv` holds one `chunk_id<TAB>offset<TAB>length` line per chunk.
+    Data is always written before its offset line, so a crash mid-write only
+    leaves unreferenced bytes behind. When an ID is appended twice (e.g. on a
+    resumed ingest) the latest entry wins; a deleted ID is recorded as a
+    tombstone line with offset -1.
+    """
+
+    def __init__(self, path=DOCSTORE_DIR):
+        self.path = path
+        self.data_path = os.path.join(path, "chunks.bin")
+        self.offsets_path = os.path.join(path, "offsets.tsv")
+        self._offsets = {}
+        self._offsets_read = 0
+        self._mmap = None
+        self._lock = threading.Lock()
+
+    # --- Writing (ingest) ---
+
+    def append_many(self, items):
+        """Appends (chunk_id, text) pairs and flushes them to disk."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.data_path, "ab") as data, open(self.offsets_path, "a", encoding="utf-8") as offsets:
+            offset = data.tell()
+            lines = []
+            for chunk_id, text in items:
+                encoded = text.encode("utf-8")
+                data.write(encoded)
+                lines.append(f"{chunk_id}\t{offset}\t{len(encoded)}\n")
+                offset += len(encoded)
+            data.flush()
+            os.fsync(data.fileno())
+            offsets.writelines(lines)
+
+    def delete_many(self, chunk_ids):
+        """Marks chunk IDs as deleted; their bytes stay until the store is rebuilt."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.offsets_path, "a", encoding="utf-8") as offsets:
+            offsets.writelines(f"{chunk_id}\t-1\t0\n" for chunk_id in chunk_ids)
+
+    # --- Reading (retrieval) ---
+
+    def _offsets_grown(self):
+        try:
+            return os.path.getsize(self.offsets_path) > self._offsets_read
+        except FileNotFoundError:
+            return False
+
+    def _refresh(self):
+        """Picks up entries appended since the last read and remaps the data file."""
+        if not os.path.exists(self.offsets_path):
+            return
+        # offsets.tsv can exist without chunks.bin if deletes ran before any append
+        data_size = os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        with open(self.offsets_path, "r", encoding="utf-8") as f:
+            f.seek(self._offsets_read)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # partially written line, picked up on a later refresh
+                self._offsets_read += len(line.encode("utf-8"))
+                chunk_id, offset, length = line.rstrip("\n").split("\t")
+                if int(offset) < 0:
+                    self._offsets.pop(chunk_id, None)
+                elif int(offset) + int(length) <= data_size:
+                    self._offsets[chunk_id] = (int(offset), int(length))
+        if data_size and (self._mmap is None or len(self._mmap) < data_size):
+            with open(self.data_path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def get_bytes(self, chunk_id):
+        """Returns a zero-copy memoryview over a chunk's UTF-8 bytes, or None."""
+        with self._lock:
+            # A re-appended or deleted ID only shows up in offsets.tsv, so
+            # re-read it whenever it has grown rather than only on a miss
+            if self._offsets_grown():
+                self._refresh()
+            location = self._offsets.get(chunk_id)
+            if location is None:
+                return None
+            offset, length = location
+            return memoryview(self._mmap)[offset:offset + length]
+
+    def get(self, chunk_id):
+        """Returns a chunk's text, or None if the ID is unknown."""
+        view = self.get_bytes(chunk_id)
+        return None if view is None else str(view, "utf-8")
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
@@ -8,3 +8,6 @@ import os
 
 OPENAI_API_KEY = st.secrets.get("OPENAI_API_KEY", os.getenv("OPENAI_API_KEY"))
 PINECONE_API_KEY = st.secrets.get("PINECONE_API_KEY", os.getenv("PINECONE_API_KEY"))
+
+# Maximum prompt size per turn (system prompt + history + context + query)
+PROMPT_TOKEN_BUDGET = int(st.secrets.get("PROMPT_TOKEN_BUDGET", os.getenv("PROMPT_TOKEN_BUDGET", 8000)))
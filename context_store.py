@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict, deque
+
+from vector_math import cosine
+
+
+class SessionContextStore:
+    """
+    Keeps the documents retrieved on recent turns of each chat session so
+    follow-up turns can re-rank that context instead of running a new vector
+    search. Chunk embeddings are computed locally the first time a follow-up
+    re-ranks them and kept with the cached documents, so queries never need to
+    fetch vector values from the index.
+
+    Each session keeps its last `max_turns` retrievals; the least recently
+    used sessions are dropped beyond `max_sessions`.
+    """
+
+    def __init__(self, max_turns=3, max_sessions=200, min_score=0.3):
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        # Cached documents less similar than this to the query are not reused
+        self.min_score = min_score
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_turn(self, session_id, docs):
+        """Records the documents retrieved for a turn."""
+        if session_id is None or not docs:
+            return
+        with self._lock:
+            turns = self._sessions.setdefault(session_id, deque(maxlen=self.max_turns))
+            # Each entry is [document, embedding]; embeddings are filled lazily
+            turns.append([[doc, None] for doc in docs])
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def has_context(self, session_id):
+        with self._lock:
+            return bool(self._sessions.get(session_id))
+
+    def rerank(self, session_id, query_vector, k, embed_documents, sources=None):
+        """
+        Merges the cached documents of a session, newest turn first and
+        de-duplicated by chunk ID, and returns up to k of them scoring at least
+        `min_score` against the query, best first. `embed_documents` embeds
+        any cached chunks that have not been scored before. If `sources` is
+        given, only documents from those files (as their source or one of
+        their alt_sources) are considered.
+        """
+        with self._lock:
+            turns = list(self._sessions.get(session_id, ()))
+            if turns:
+                self._sessions.move_to_end(session_id)
+        merged = {}
+        for turn in reversed(turns):
+            for entry in turn:
+                doc = entry[0]
+                if sources and doc.metadata.get("source") not in sources and not (
+                    set(doc.metadata.get("alt_sources", ())) & set(sources)
+                ):
+                    continue
+                merged.setdefault(doc.metadata.get("id", doc.page_content), entry)
+
+        entries = list(merged.values())
+        missing = [entry for entry in entries if entry[1] is None]
+        if missing:
+            vectors = embed_documents([entry[0].page_content for entry in missing])
+            for entry, vector in zip(missing, vectors):
+                entry[1] = vector
+
+        scored = [(cosine(query_vector, vector), doc) for doc, vector in entries]
+        scored = sorted((item for item in scored if item[0] >= self.min_score),
+                        key=lambda item: item[0], reverse=True)
+        return [doc for _, doc in scored[:k]]
+
+    def evict(self, session_id):
+        """Drops a session's cached context, e.g. when the session is deleted."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+
+# Shared by every Streamlit session in this process
+session_contexts = SessionContextStore()
@@ -8,10 +8,17 @@ from langchain_community.document_loaders import (
 from langchain.docstore.document import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone, ServerlessSpec
+from itertools import islice
+import hashlib
+import json
 import os
 from config import PINECONE_API_KEY
+from act_aliases import build_alias_index, save_aliases
+from chunk_docstore import ChunkDocstore
+from dedup import NearDuplicateDetector
+from extraction_cache import cached_pages, file_hash
+from vector_client import VectorStoreClient
 
 # Path to Input
 current_file_path = os.path.abspath(__file__)
@@ -19,6 +26,17 @@ current_dir = os.path.dirname(current_file_path)
 project_root = os.path.dirname(current_dir)
 INPUT_PATH = os.path.join(project_root, "Legal_Chatbot_Inputs")
 
+# Ingestion progress, so an interrupted run resumes where it stopped
+CHECKPOINT_PATH = os.path.join(current_dir, "ingest_checkpoint.json")
+
+# Batch sizes. Only one ingest batch of chunks is held in memory at a time;
+# it is embedded in slices and upserted as parallel fixed-size batches.
+INGEST_BATCH_SIZE = 400
+EMBED_BATCH_SIZE = 64
+UPSERT_BATCH_SIZE = 100
+UPSERT_WORKERS = 4
+DELETE_BATCH_SIZE = 1000
+
 # Setup Pinecone
 pc = Pinecone(api_key=PINECONE_API_KEY)
 PINECONE_INDEX_NAME = "legal-chatbot-index"
@@ -32,20 +50,40 @@ if PINECONE_INDEX_NAME not in [idx["name"] for idx in pc.list_indexes()]:
     )
 
 
+# Embedding and chunking settings. Changing any of them changes the config
+# fingerprint, which re-ingests every file and replaces its old chunks.
+EMBEDDING_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+CHUNK_SIZE = 2000
+CHUNK_OVERLAP = 200
+SEPARATORS = ["\n\n", "\n", " ", ""]
+
 # Embedding model
-embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+embedding_model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
 
 # Splitter
 splitter = RecursiveCharacterTextSplitter(
-    chunk_size=2000,
-    chunk_overlap=200,
-    separators=["\n\n", "\n", " ", ""]
+    chunk_size=CHUNK_SIZE,
+    chunk_overlap=CHUNK_OVERLAP,
+    separators=SEPARATORS
 )
 
+
+def config_fingerprint():
+    """Short hash of the settings that determine a file's chunks and vectors."""
+    settings = {
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "separators": SEPARATORS,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:8]
+
 # File loader
 def loadFile(f_path):
+    """Returns an iterator over the pages of a file, parsed one at a time."""
     if f_path.endswith(".pdf"):
-        loader = PyPDFLoader(f_path)
+        # PDF parsing is the slowest step, so reuse previously extracted pages
+        return cached_pages(f_path, PyPDFLoader(f_path))
     elif f_path.endswith(".docx"):
         loader = Docx2txtLoader(f_path)
     elif f_path.endswith(".txt"):
@@ -53,29 +91,153 @@ def loadFile(f_path):
     elif f_path.endswith(".html"):
         loader = UnstructuredHTMLLoader(f_path)
     else:
-        return []
-    return loader.load()
-
-# Process local files
-for fileName in os.listdir(INPUT_PATH):
-    file_path = os.path.join(INPUT_PATH, fileName)
-    if os.path.isfile(file_path):
-        print(f"Loading: {fileName}")
-        docs = loadFile(file_path)
-        if not docs:
+        return iter([])
+    return loader.lazy_load()
+
+
+def iter_chunks(fileName, pages):
+    """Splits pages into chunk Documents as the pages are read."""
+    for page in pages:
+        for chunk in splitter.split_text(page.page_content):
+            yield Document(page_content=chunk, metadata={"source": fileName})
+
+
+def batched(iterable, size):
+    """Yields lists of up to `size` items, pulling from the iterable lazily."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def load_checkpoint():
+    if not os.path.exists(CHECKPOINT_PATH):
+        return {}
+    with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(checkpoint):
+    """Writes the checkpoint atomically so a crash never leaves it half-written."""
+    tmp_path = CHECKPOINT_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, CHECKPOINT_PATH)
+
+
+def embed_batch(texts):
+    """Embeds texts in slices of EMBED_BATCH_SIZE."""
+    vectors = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        vectors.extend(embedding_model.embed_documents(texts[start:start + EMBED_BATCH_SIZE]))
+    return vectors
+
+
+def remove_stale_chunks(fileName, progress, client, docstore):
+    """
+    Deletes the vectors and docstore entries a previous ingest of a file wrote
+    under a different file hash or config. When that ingest was interrupted,
+    the batch in flight may be partly stored, so one extra batch is covered.
+    """
+    prefix = progress.get("prefix", progress["hash"][:16])
+    written = progress["chunks"] + (0 if progress["done"] else INGEST_BATCH_SIZE)
+    stale_ids = (f"{prefix}-{position}" for position in range(written))
+    for ids in batched(stale_ids, DELETE_BATCH_SIZE):
+        client.delete(ids)
+        docstore.delete_many(ids)
+    print(f"Removed up to {written} stale chunks of {fileName}")
+
+
+def ingest_file(fileName, file_path, client, docstore, deduper, checkpoint, later_files=()):
+    """
+    Streams one file through split -> dedup -> embed -> upsert in fixed-size
+    batches, recording each stored batch in the checkpoint. Chunk IDs are
+    derived from the file hash, the config fingerprint and chunk position, so
+    re-upserting after a crash is idempotent and chunks from different
+    chunking or embedding settings never share an ID. Chunk text goes to the
+    local docstore; the index only holds IDs and source. Returns the number of
+    chunks stored by this call.
+
+    Already-stored batches are still passed through the deduper, so a resumed
+    run drops the same duplicates as an uninterrupted one.
+
+    Later files only store chunks that do not duplicate an earlier file's, so
+    when this file is re-ingested (and its old chunks deleted), the checkpoint
+    entries of `later_files` are marked stale in the same save. They are then
+    re-ingested too, even after a crash, instead of losing the passages that
+    were deduplicated against the old chunks.
+    """
+    digest = file_hash(file_path)
+    config = config_fingerprint()
+    prefix = f"{digest[:16]}-{config}"
+    progress = checkpoint.get(fileName)
+    if (not progress or progress["hash"] != digest or progress.get("config") != config
+            or progress.get("stale")):
+        for later in later_files:
+            if later in checkpoint:
+                checkpoint[later]["stale"] = True
+        save_checkpoint(checkpoint)
+        if progress:
+            remove_stale_chunks(fileName, progress, client, docstore)
+        progress = {"hash": digest, "config": config, "prefix": prefix, "chunks": 0, "done": False}
+        checkpoint[fileName] = progress
+        save_checkpoint(checkpoint)
+    if progress["done"]:
+        print(f"{fileName} already ingested; only indexing it for deduplication")
+
+    stored = 0
+    chunks = iter_chunks(fileName, loadFile(file_path))
+    for batch_no, batch in enumerate(batched(chunks, INGEST_BATCH_SIZE)):
+        first_id = batch_no * INGEST_BATCH_SIZE
+        ids = [f"{prefix}-{first_id + i}" for i in range(len(batch))]
+        kept = [
+            (chunk_id, doc) for chunk_id, doc in zip(ids, batch)
+            if deduper.check(chunk_id, doc.page_content, fileName) is None
+        ]
+        if first_id + len(batch) <= progress["chunks"]:
             continue
+        if kept:
+            ids = [chunk_id for chunk_id, _ in kept]
+            docs = [doc for _, doc in kept]
+            texts = [doc.page_content for doc in docs]
+            docstore.append_many(zip(ids, texts))
+            vectors = [
+                {"id": chunk_id, "values": values, "metadata": doc.metadata}
+                for chunk_id, doc, values in zip(ids, docs, embed_batch(texts))
+            ]
+            stored += client.upsert_batches(batched(vectors, UPSERT_BATCH_SIZE))
+        progress["chunks"] = first_id + len(batch)
+        save_checkpoint(checkpoint)
+
+    progress["done"] = True
+    save_checkpoint(checkpoint)
+    return stored
+
+
+def ingest_all():
+    """Processes local files one at a time, resuming from the last checkpoint."""
+    client = VectorStoreClient.connect(PINECONE_API_KEY, PINECONE_INDEX_NAME, pool_size=UPSERT_WORKERS)
+    docstore = ChunkDocstore()
+    deduper = NearDuplicateDetector()
+    checkpoint = load_checkpoint()
+    file_names = sorted(os.listdir(INPUT_PATH))
+    # Act and judgment names used to scope retrieval to the sources a query names
+    save_aliases(build_alias_index(file_names))
+    for position, fileName in enumerate(file_names):
+        file_path = os.path.join(INPUT_PATH, fileName)
+        if os.path.isfile(file_path):
+            print(f"Loading: {fileName}")
+            dropped_before = deduper.dropped
+            stored = ingest_file(
+                fileName, file_path, client, docstore, deduper, checkpoint, file_names[position + 1:]
+            )
+            print(f"Stored {stored} chunks from {fileName}, dropped {deduper.dropped - dropped_before} near-duplicates")
+
+    # Record where each dropped duplicate came from on its canonical chunk
+    for chunk_id, sources in deduper.alternates.items():
+        client.update_metadata(chunk_id, {"alt_sources": sorted(sources)})
+    print(f"Dropped {deduper.dropped} near-duplicate chunks in total; "
+          f"{len(deduper.alternates)} canonical chunks have alternate sources")
+
 
-        # Split into chunks
-        final_docs = []
-        for doc in docs:
-            chunks = splitter.split_text(doc.page_content)
-            for chunk in chunks:
-                final_docs.append(Document(page_content=chunk, metadata={"source": fileName}))
-
-        # Store in Pinecone
-        PineconeVectorStore.from_documents(
-            documents=final_docs,
-            embedding=embedding_model,
-            index_name=PINECONE_INDEX_NAME
-        )
-        print(f"Stored {len(final_docs)} chunks from {fileName}")
\ No newline at end of file
+if __name__ == "__main__":
+    ingest_all()
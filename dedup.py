@@ -0,0 +1,77 @@
+import re
+import zlib
+
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class NearDuplicateDetector:
+    """
+    Detects near-duplicate chunks with MinHash signatures and LSH banding.
+
+    Each chunk is reduced to a `num_perm` MinHash signature over its word
+    shingles. Signatures are split into `bands` bands; chunks sharing any band
+    are candidates, and a candidate counts as a duplicate when the estimated
+    Jaccard similarity of the two signatures reaches `threshold`. The first
+    chunk seen is kept as canonical and later duplicates are dropped, with
+    their sources recorded against the canonical chunk.
+    """
+
+    def __init__(self, num_perm=128, bands=32, threshold=0.8, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+        self._sources = {}
+        self.alternates = {}
+        self.dropped = 0
+
+    def _shingles(self, text):
+        words = re.sub(r"\s+", " ", text.lower()).strip().split(" ")
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, text):
+        """Returns the MinHash signature of a text as a uint32 array."""
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in self._shingles(text)), dtype=np.uint64
+        )
+        # Universal hashing (a*x + b) mod p, one row per permutation
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME
+        return (permuted & MAX_HASH).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def check(self, chunk_id, text, source):
+        """
+        Returns the canonical chunk ID if the text near-duplicates a chunk seen
+        earlier, or None after registering it as a new canonical chunk.
+        """
+        signature = self.signature(text)
+        keys = self._band_keys(signature)
+        candidates = set()
+        for bucket, key in zip(self._buckets, keys):
+            candidates.update(bucket.get(key, ()))
+        for candidate in sorted(candidates):
+            if np.mean(self._signatures[candidate] == signature) >= self.threshold:
+                self.dropped += 1
+                if source != self._sources[candidate]:
+                    self.alternates.setdefault(candidate, set()).add(source)
+                return candidate
+
+        for bucket, key in zip(self._buckets, keys):
+            bucket.setdefault(key, []).append(chunk_id)
+        self._signatures[chunk_id] = signature
+        self._sources[chunk_id] = source
+        return None
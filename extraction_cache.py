@@ -0,0 +1,77 @@
+import gzip
+import hashlib
+import json
+import os
+from importlib import metadata
+
+from langchain.docstore.document import Document
+
+# Parsed pages are cached next to this file, one gzip'd JSON-lines file per
+# (file content, loader version) pair.
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".extraction_cache")
+
+# Bump this when the on-disk layout below changes.
+CACHE_FORMAT_VERSION = 1
+
+# Packages whose upgrades can change the extracted text for a given loader.
+LOADER_PACKAGES = {
+    "PyPDFLoader": ("pypdf", "langchain-community"),
+    "Docx2txtLoader": ("docx2txt", "langchain-community"),
+    "UnstructuredHTMLLoader": ("unstructured", "langchain-community"),
+    "TextLoader": ("langchain-community",),
+}
+
+
+def file_hash(f_path, block_size=1 << 20):
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(f_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def loader_version(loader):
+    """Returns a string identifying the loader class and the versions it depends on."""
+    name = type(loader).__name__
+    versions = []
+    for package in LOADER_PACKAGES.get(name, ()):
+        try:
+            versions.append(f"{package}={metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}=unknown")
+    return f"{name}[{','.join(versions)}]v{CACHE_FORMAT_VERSION}"
+
+
+def cache_path(f_path, loader):
+    """Returns the cache file path for a file parsed by the given loader."""
+    key = hashlib.sha256(f"{file_hash(f_path)}:{loader_version(loader)}".encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.jsonl.gz")
+
+
+def cached_pages(f_path, loader):
+    """
+    Yields the pages of a file as Documents, parsing it with the loader only on
+    a cache miss. Pages are written to the cache as they are parsed, and the
+    cache file only becomes visible once the whole file has been read.
+    """
+    path = cache_path(f_path, loader)
+    if os.path.exists(path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                yield Document(page_content=record["c"], metadata=record["m"])
+        return
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            for doc in loader.lazy_load():
+                record = {"c": doc.page_content, "m": doc.metadata}
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                yield doc
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
@@ -0,0 +1,152 @@
+"""
+In-process stand-in for a Pinecone index, used to exercise VectorStoreClient
+offline. It supports the subset of the data-plane API the app uses and can
+inject latency and transient failures.
+
+Run `python fake_vector_index.py` for a throughput and retry benchmark.
+"""
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+from vector_math import cosine
+
+
+class FakeTransientError(Exception):
+    """Mimics a Pinecone 503 response."""
+
+    def __init__(self, message="Service Unavailable", status=503):
+        super().__init__(message)
+        self.status = status
+
+
+def _matches_filter(metadata, filter):
+    """
+    Evaluates the $eq/$in/$nin/$or subset of Pinecone's metadata filter
+    syntax. As in Pinecone, a list-valued field matches $in if any of its
+    elements does.
+    """
+    for field, condition in (filter or {}).items():
+        if field == "$or":
+            if not any(_matches_filter(metadata, clause) for clause in condition):
+                return False
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(field)
+        values = value if isinstance(value, list) else [value]
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$in" and not any(v in expected for v in values):
+                return False
+            if op == "$nin" and any(v in expected for v in values):
+                return False
+    return True
+
+
+class FakeVectorIndex:
+    """Thread-safe in-memory vector index with optional latency and failures."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, seed=None):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.vectors = {}
+        self.calls = {"upsert": 0, "query": 0, "update": 0, "delete": 0, "failed": 0}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _simulate(self, method, timeout):
+        with self._lock:
+            self.calls[method] += 1
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.calls["failed"] += 1
+        if self.latency:
+            if timeout is not None and self.latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError(f"{method} timed out after {timeout}s")
+            time.sleep(self.latency)
+        if fail:
+            raise FakeTransientError()
+
+    def upsert(self, vectors, namespace=None, _request_timeout=None, **kwargs):
+        self._simulate("upsert", _request_timeout)
+        with self._lock:
+            for vector in vectors:
+                self.vectors[(namespace, vector["id"])] = {
+                    "values": list(vector["values"]),
+                    "metadata": dict(vector.get("metadata") or {}),
+                }
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector, top_k=10, filter=None, namespace=None, include_metadata=True,
+              include_values=False, _request_timeout=None, **kwargs):
+        self._simulate("query", _request_timeout)
+        with self._lock:
+            candidates = [
+                (vector_id, record)
+                for (ns, vector_id), record in self.vectors.items()
+                if ns == namespace and _matches_filter(record["metadata"], filter)
+            ]
+        scored = sorted(
+            ((cosine(vector, record["values"]), vector_id, record) for vector_id, record in candidates),
+            key=lambda item: item[0],
+            reverse=True,
+        )[:top_k]
+        matches = [
+            SimpleNamespace(
+                id=vector_id,
+                score=score,
+                metadata=dict(record["metadata"]) if include_metadata else None,
+                values=list(record["values"]) if include_values else [],
+            )
+            for score, vector_id, record in scored
+        ]
+        return SimpleNamespace(matches=matches, namespace=namespace or "")
+
+    def update(self, id, set_metadata=None, namespace=None, _request_timeout=None, **kwargs):
+        self._simulate("update", _request_timeout)
+        with self._lock:
+            self.vectors[(namespace, id)]["metadata"].update(set_metadata or {})
+        return {}
+
+    def delete(self, ids, namespace=None, _request_timeout=None, **kwargs):
+        self._simulate("delete", _request_timeout)
+        with self._lock:
+            for vector_id in ids:
+                self.vectors.pop((namespace, vector_id), None)
+        return {}
+
+    def describe_index_stats(self, _request_timeout=None, **kwargs):
+        with self._lock:
+            return {"total_vector_count": len(self.vectors)}
+
+
+def benchmark(num_vectors=5000, batch_size=100, dimension=384, latency=0.02,
+              failure_rate=0.1, max_workers=8):
+    """Measures upsert throughput and retry behaviour against a flaky fake index."""
+    from vector_client import VectorStoreClient
+
+    index = FakeVectorIndex(latency=latency, failure_rate=failure_rate, seed=0)
+    client = VectorStoreClient(index, max_workers=max_workers, base_delay=0.01, max_delay=0.1)
+    rng = random.Random(0)
+    batches = (
+        [
+            {"id": f"v-{start + i}", "values": [rng.random() for _ in range(dimension)]}
+            for i in range(min(batch_size, num_vectors - start))
+        ]
+        for start in range(0, num_vectors, batch_size)
+    )
+
+    started = time.perf_counter()
+    stored = client.upsert_batches(batches)
+    elapsed = time.perf_counter() - started
+    print(f"Upserted {stored} vectors in {elapsed:.2f}s ({stored / elapsed:.0f} vectors/s)")
+    print(f"Calls: {index.calls}, client retries: {client.retries}")
+    assert index.describe_index_stats()["total_vector_count"] == num_vectors
+
+
+if __name__ == "__main__":
+    benchmark()
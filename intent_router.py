@@ -0,0 +1,141 @@
+import re
+from collections import Counter
+from typing import List, NamedTuple, Optional
+
+from vector_math import cosine
+
+NEW_TOPIC = "new_topic"
+FOLLOW_UP = "follow_up"
+SYNTHESIS = "synthesis"
+SMALL_TALK = "small_talk"
+
+# How many chunks to retrieve for each intent. Small talk and syntheses that
+# explicitly point back to earlier turns are answered from chat_history alone.
+RETRIEVAL_DEPTH = {NEW_TOPIC: 10, FOLLOW_UP: 4, SYNTHESIS: 0, SMALL_TALK: 0}
+
+SMALL_TALK_PATTERN = re.compile(
+    r"^(hi|hii+|hello|hey|hola|namaste|thanks|thank you|thank you so much|thx|ok|okay|cool|great|"
+    r"good (morning|afternoon|evening|night)|bye|goodbye|see you|how are you|who are you|"
+    r"what can you do)\b[\s!.,?]*(there|again|a lot|very much)?[\s!.,?]*$",
+    re.IGNORECASE,
+)
+# Short acknowledgements such as "Thanks, that helps" or "Ok got it"; the whole
+# message must be acknowledgement, so "ok explain article 21" is not one
+_ACKNOWLEDGEMENT = (
+    r"(thanks|thank you|thx|ok|okay|cool|great|perfect|got it|understood|noted|alright|makes sense|"
+    r"that helps|that('s| is) (helpful|clear)|very helpful|(a lot|so much|very much))"
+)
+ACKNOWLEDGEMENT_PATTERN = re.compile(
+    rf"^{_ACKNOWLEDGEMENT}([\s!.,]+{_ACKNOWLEDGEMENT})*[\s!.,]*$",
+    re.IGNORECASE,
+)
+SYNTHESIS_PATTERN = re.compile(
+    r"\b(summari[sz]e|summary|recap|compare|comparison|contrast|difference|differ|"
+    r"distinguish|in short|tl;?dr)\b",
+    re.IGNORECASE,
+)
+# Explicit references to the conversation itself; bare pronouns are not enough
+CONVERSATION_REFERENCE_PATTERN = re.compile(
+    r"\b(you (just )?(said|mentioned|explained|told me)|(as )?(mentioned|discussed|stated) (above|earlier|before)|"
+    r"the above|above (points|answers?|sections?)|(previous|last|earlier) (answer|response|reply|question|points?)|"
+    r"we (discussed|talked about|covered)|so far|both of (these|those|them)|all of (these|those|the above))\b",
+    re.IGNORECASE,
+)
+# Weak follow-up signals: they lower the similarity bar but never decide alone
+FOLLOW_UP_OPENER_PATTERN = re.compile(
+    r"^(and|but|also|so|then|what about|how about|why|what if|can you (explain|elaborate)|"
+    r"explain( more| further)?|elaborate|tell me more|give (me )?an example|any exceptions?)\b",
+    re.IGNORECASE,
+)
+ANAPHORA_PATTERN = re.compile(
+    r"\b(that|this|it|its|these|those|them|they|same|former|latter)\b",
+    re.IGNORECASE,
+)
+
+
+class RouteDecision(NamedTuple):
+    intent: str
+    k: int
+    reason: str
+    query_vector: Optional[List[float]] = None
+
+
+class IntentRouter:
+    """
+    Classifies each turn as new topic, follow-up, synthesis or small talk using
+    regex rules plus embedding similarity to recent user turns, without an LLM
+    call, and picks how many chunks to retrieve for it.
+    """
+
+    def __init__(self, embeddings, history_turns=2, similarity_threshold=0.55, weak_signal_threshold=0.35,
+                 synthesis_threshold=0.7, max_follow_up_words=15, max_acknowledgement_words=6):
+        self.embeddings = embeddings
+        self.history_turns = history_turns
+        # Similarity to a recent turn needed for a follow-up, lowered when the
+        # query opens like a follow-up or leans on a pronoun
+        self.similarity_threshold = similarity_threshold
+        self.weak_signal_threshold = weak_signal_threshold
+        # Similarity needed to treat a compare/summarise request as a synthesis
+        # of earlier turns when it does not explicitly point back to them
+        self.synthesis_threshold = synthesis_threshold
+        self.max_follow_up_words = max_follow_up_words
+        self.max_acknowledgement_words = max_acknowledgement_words
+        self.counts = Counter()
+        self._turn_vectors = {}
+
+    def _embed_turn(self, text):
+        """Embeds an earlier user turn, caching it since it recurs on later turns."""
+        if text not in self._turn_vectors:
+            if len(self._turn_vectors) > 1000:
+                self._turn_vectors.clear()
+            self._turn_vectors[text] = self.embeddings.embed_query(text)
+        return self._turn_vectors[text]
+
+    def classify(self, query, chat_history):
+        """Returns (intent, k, reason, query_vector) for a turn."""
+        text = query.strip()
+        words = len(text.split())
+        user_turns = [m.content for m in chat_history if getattr(m, "type", None) == "human"]
+
+        if SMALL_TALK_PATTERN.match(text):
+            return SMALL_TALK, RETRIEVAL_DEPTH[SMALL_TALK], "greeting or pleasantry", None
+        if words <= self.max_acknowledgement_words and ACKNOWLEDGEMENT_PATTERN.match(text):
+            return SMALL_TALK, RETRIEVAL_DEPTH[SMALL_TALK], "acknowledgement", None
+        if not user_turns:
+            return NEW_TOPIC, RETRIEVAL_DEPTH[NEW_TOPIC], "first turn of the session", None
+
+        query_vector = self.embeddings.embed_query(text)
+        recent = user_turns[-self.history_turns:]
+        similarity = max(cosine(query_vector, self._embed_turn(turn)) for turn in recent)
+        references_conversation = bool(CONVERSATION_REFERENCE_PATTERN.search(text))
+
+        if SYNTHESIS_PATTERN.search(text):
+            if references_conversation:
+                # Only an explicit pointer back to the conversation skips retrieval
+                return (SYNTHESIS, RETRIEVAL_DEPTH[SYNTHESIS],
+                        "asks to summarise or compare earlier turns", query_vector)
+            if similarity >= self.synthesis_threshold:
+                return (SYNTHESIS, RETRIEVAL_DEPTH[FOLLOW_UP],
+                        f"compares topics close to recent turns ({similarity:.2f})", query_vector)
+            return NEW_TOPIC, RETRIEVAL_DEPTH[NEW_TOPIC], f"new comparison ({similarity:.2f})", query_vector
+
+        if references_conversation:
+            return FOLLOW_UP, RETRIEVAL_DEPTH[FOLLOW_UP], "refers back to the conversation", query_vector
+        weak_signal = words <= self.max_follow_up_words and bool(
+            FOLLOW_UP_OPENER_PATTERN.match(text) or ANAPHORA_PATTERN.search(text)
+        )
+        threshold = self.weak_signal_threshold if weak_signal else self.similarity_threshold
+        if similarity >= threshold:
+            reason = "follow-up cue and " if weak_signal else ""
+            return (FOLLOW_UP, RETRIEVAL_DEPTH[FOLLOW_UP],
+                    f"{reason}similar to a recent turn ({similarity:.2f})", query_vector)
+        return NEW_TOPIC, RETRIEVAL_DEPTH[NEW_TOPIC], f"unrelated to recent turns ({similarity:.2f})", query_vector
+
+    def route(self, query, chat_history):
+        """Classifies a turn, logs the decision and returns a RouteDecision."""
+        decision = RouteDecision(*self.classify(query, chat_history))
+        intent = decision.intent
+        self.counts[intent] += 1
+        tally = ", ".join(f"{name}={count}" for name, count in sorted(self.counts.items()))
+        print(f"Route: {intent} (k={decision.k}) - {decision.reason} [{tally}]")
+        return decision
@@ -1,16 +1,23 @@
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.runnables import RunnableLambda, RunnablePassthrough
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_pinecone import PineconeVectorStore
+from act_aliases import SourceDetector, load_aliases
 from chatbot_system_template import SYSTEM_TEMPLATE
+from chunk_docstore import ChunkDocstore
+from context_store import session_contexts
+from intent_router import FOLLOW_UP, IntentRouter
+from token_budget import TokenAccountant
+from legal_retriever import VectorClientRetriever
+from vector_client import VectorStoreClient
 from langchain.schema import AIMessage, HumanMessage
-from config import OPENAI_API_KEY, PINECONE_API_KEY
+from config import OPENAI_API_KEY, PINECONE_API_KEY, PROMPT_TOKEN_BUDGET
 import streamlit as st
 
 # Your Pinecone index
 INDEX_NAME = "legal-chatbot-index"
+LLM_MODEL = "gpt-3.5-turbo-1106"
 
 @st.cache_resource
 def create_rag_chain():
@@ -24,35 +31,101 @@ def create_rag_chain():
         model_name="sentence-transformers/all-MiniLM-L6-v2",
         model_kwargs={'device': 'cpu'}
     )
-    llm = ChatOpenAI(model="gpt-3.5-turbo-1106", temperature=0.3, api_key=OPENAI_API_KEY)
+    llm = ChatOpenAI(model=LLM_MODEL, temperature=0.3, api_key=OPENAI_API_KEY)
     
     # Use a try-except block for robustness in connecting to Pinecone
     try:
-        vectorstore = PineconeVectorStore.from_existing_index(index_name=INDEX_NAME, embedding=embeddings)
+        vector_client = VectorStoreClient.connect(PINECONE_API_KEY, INDEX_NAME)
+        vector_client.describe_index_stats()
         print("Connected to Pinecone vectorstore")
     except Exception as e:
         st.error(f"Failed to connect to Pinecone: {e}")
         return None
 
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 10})
+    # Chunk text is only in the local docstore, so without it every answer
+    # would be built from empty context
+    docstore = ChunkDocstore()
+    if not len(docstore):
+        st.error(f"Chunk docstore at {docstore.path} is empty. Run datasets_utils.py or copy the docstore/ folder from the ingest machine.")
+        return None
+
+    retriever = VectorClientRetriever(
+        client=vector_client, embeddings=embeddings, docstore=docstore, k=10
+    )
     print("Retriever created")
 
     # Updated prompt to handle chat history
+    system_prompt = SYSTEM_TEMPLATE + "\n\nUse the following retrieved context:\n{context}"
     final_prompt = ChatPromptTemplate.from_messages([
-        ("system", SYSTEM_TEMPLATE + "\n\nUse the following retrieved context:\n{context}"),
+        ("system", system_prompt),
         MessagesPlaceholder(variable_name="chat_history"),
         ("user", "{input}")
     ])
 
+    # Route each turn before retrieval so greetings and history-only
+    # follow-ups skip or shrink the vector search
+    router = IntentRouter(embeddings)
+    # Scope the search to acts and judgments the query names outright
+    source_detector = SourceDetector(load_aliases())
+    # Keep every prompt within the token budget by shrinking k and trimming chunks
+    accountant = TokenAccountant(system_prompt.replace("{context}", ""), PROMPT_TOKEN_BUDGET, model=LLM_MODEL)
+
+    def route(inputs):
+        return router.route(inputs["input"], inputs["chat_history"])
+
+    def retrieve(inputs):
+        decision = inputs["route"]
+        session_id = inputs.get("session_id")
+        k = accountant.plan_k(inputs["input"], inputs["chat_history"], decision.k)
+        if k == 0:
+            return []
+        query_vector = decision.query_vector
+        sources = source_detector.detect(inputs["input"])
+        if decision.intent == FOLLOW_UP and session_contexts.has_context(session_id):
+            # Re-rank what earlier turns of this session already retrieved, and
+            # only reuse it if enough of it is still relevant to this question
+            if query_vector is None:
+                query_vector = embeddings.embed_query(inputs["input"])
+            docs = session_contexts.rerank(
+                session_id, query_vector, k, embeddings.embed_documents, sources=sources
+            )
+            if len(docs) >= max(1, k // 2):
+                print(f"Reusing {len(docs)} cached chunks for session {session_id}")
+                return docs
+            print(f"Cached context for session {session_id} is not relevant enough; searching")
+        if sources:
+            print(f"Filtering retrieval to sources: {sources}")
+        docs = retriever.search(inputs["input"], k=k, vector=query_vector, sources=sources)
+        if sources and not docs:
+            # Named sources may not be in the index; fall back to a full search
+            docs = retriever.search(inputs["input"], k=k, vector=query_vector)
+        session_contexts.add_turn(session_id, docs)
+        return docs
+
+    def fit_budget(inputs):
+        docs, history, report = accountant.fit(inputs["input"], inputs["chat_history"], inputs["context"])
+        return {**inputs, "context": docs, "chat_history": history, "token_report": report}
+
+    def log_tokens(inputs):
+        accountant.log_turn(inputs["token_report"], inputs["answer"])
+        return inputs
+
     question_answer_chain = create_stuff_documents_chain(llm, final_prompt)
-    ragChain = create_retrieval_chain(retriever, question_answer_chain)
+    ragChain = (
+        RunnablePassthrough.assign(route=RunnableLambda(route))
+        .assign(context=RunnableLambda(retrieve).with_config(run_name="retrieve_documents"))
+        | RunnableLambda(fit_budget)
+        | RunnablePassthrough.assign(answer=question_answer_chain)
+        | RunnableLambda(log_tokens)
+    )
     print("RAG chain loaded successfully")
     return ragChain
 
 
-def ask_query(ragChain, user_query, chat_history):
+def ask_query(ragChain, user_query, chat_history, session_id=None):
     """
-    Processes a user query using the RAG chain.
+    Processes a user query using the RAG chain. The session ID lets follow-up
+    turns reuse the context retrieved earlier in the same chat session.
     """
     if not ragChain:
         return "Error: The RAG chain is not initialized. Please check the connection to Pinecone and API keys."
@@ -67,6 +140,7 @@ def ask_query(ragChain, user_query, chat_history):
 
     response = ragChain.invoke({
         "input": user_query,
-        "chat_history": formatted_history
+        "chat_history": formatted_history,
+        "session_id": session_id
     })
     return response["answer"]
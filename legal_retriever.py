@@ -0,0 +1,59 @@
+from typing import Any, List, Optional
+
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+
+class VectorClientRetriever(BaseRetriever):
+    """
+    Retrieves chunks through a VectorStoreClient instead of PineconeVectorStore.
+    Chunk text is read from the local ChunkDocstore by ID, falling back to the
+    `text` metadata field for vectors ingested before the docstore existed.
+    Matches with no text in either place are logged and skipped.
+    """
+
+    client: Any
+    embeddings: Any
+    docstore: Any = None
+    k: int = 10
+    text_key: str = "text"
+    timeout: float = 10.0
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.search(query)
+
+    def search(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        vector: Optional[List[float]] = None,
+        sources: Optional[List[str]] = None,
+    ) -> List[Document]:
+        """
+        Searches with an optional k override, reusing a precomputed query vector
+        if given. `sources` restricts the search to chunks from those files.
+        """
+        if vector is None:
+            vector = self.embeddings.embed_query(query)
+        source_filter = None
+        if sources:
+            # A deduplicated chunk is stored once under its first file and lists
+            # the files it was dropped from in alt_sources
+            sources = list(sources)
+            source_filter = {"$or": [{"source": {"$in": sources}}, {"alt_sources": {"$in": sources}}]}
+        matches = self.client.query(vector, top_k=k or self.k, filter=source_filter, timeout=self.timeout)
+        docs = []
+        for match in matches:
+            metadata = dict(match.metadata or {})
+            text = metadata.pop(self.text_key, "")
+            if self.docstore is not None:
+                text = self.docstore.get(match.id) or text
+            if not text:
+                print(f"Chunk {match.id} missing from docstore; skipping")
+                continue
+            metadata.update({"id": match.id, "score": match.score})
+            docs.append(Document(page_content=text, metadata=metadata))
+        return docs
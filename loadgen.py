@@ -0,0 +1,186 @@
+"""
+Concurrent-user load test for the auth/chat-history SQLite layer.
+
+Simulates N users, each running the same flow the Streamlit app drives:
+sign up and sign in, create chat sessions, chat for several turns (with the
+sidebar session list re-read on every turn, as the app does on each rerun),
+switch back to an earlier session and delete one. Calls go through the real
+auth_utils and ask_query code paths against a throwaway database; the RAG
+chain is replaced by a fake with configurable latency.
+
+Usage:
+    python loadgen.py --users 50 --sessions 3 --turns 5 --chain-latency 0.5
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import auth_utils
+from legal_chat_bot import ask_query
+
+
+class StreamlitShim:
+    """
+    Stands in for the `st` module inside auth_utils: gives each simulated user
+    (thread) its own session_state and records the errors auth_utils reports
+    through st.error, which it otherwise swallows.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.errors = []
+
+    @property
+    def session_state(self):
+        if not hasattr(self._local, "state"):
+            self._local.state = {}
+        return self._local.state
+
+    def success(self, message):
+        pass
+
+    def error(self, message):
+        with self._lock:
+            self.errors.append(str(message))
+
+
+class FakeChain:
+    """Mimics the RAG chain's invoke() with a fixed latency and no network calls."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def invoke(self, inputs):
+        time.sleep(random.uniform(0.5, 1.5) * self.latency)
+        return {"answer": f"Simulated answer to: {inputs['input']}"}
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.exceptions = defaultdict(int)
+
+    def timed(self, operation, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception as e:
+            with self._lock:
+                self.exceptions[f"{operation}: {type(e).__name__}: {e}"] += 1
+            return None
+        finally:
+            with self._lock:
+                self.latencies[operation].append(time.perf_counter() - started)
+
+
+QUESTIONS = [
+    "What is the punishment for cheating under section 420 IPC?",
+    "What are the exceptions to that?",
+    "Explain Article 21 of the Constitution.",
+    "How does it apply to prisoners?",
+    "Summarize the difference between both.",
+]
+
+
+def simulate_user(user_no, args, chain, metrics, shim, start_barrier):
+    start_barrier.wait()
+    email = f"loadtest{user_no}@example.com"
+    password = "LoadTest#1234"
+
+    signed_up = metrics.timed("sign_up", auth_utils.sign_up, "Load", f"User{user_no}", email,
+                              password, password, None)
+    if not signed_up:
+        return
+    metrics.timed("sign_in", auth_utils.sign_in, email, password)
+    user_id = shim.session_state["user"]["id"]
+
+    session_ids = []
+    for session_no in range(args.sessions):
+        session_id = metrics.timed("create_session", auth_utils.create_new_session,
+                                   user_id, f"Session {session_no}")
+        if session_id is None:
+            continue
+        session_ids.append(session_id)
+        messages = []
+        for turn in range(args.turns):
+            prompt = QUESTIONS[turn % len(QUESTIONS)]
+            metrics.timed("list_sessions", auth_utils.get_user_sessions, user_id)
+            metrics.timed("save_message", auth_utils.add_message_to_history, session_id, "user", prompt)
+            reply = metrics.timed("ask_query", ask_query, chain, prompt, messages, session_id)
+            messages += [{"role": "user", "content": prompt}, {"role": "assistant", "content": reply}]
+            metrics.timed("save_message", auth_utils.add_message_to_history, session_id, "assistant", reply)
+
+    if session_ids:
+        metrics.timed("switch_session", auth_utils.get_session_history, random.choice(session_ids))
+        metrics.timed("delete_session", auth_utils.delete_session, session_ids[0])
+    auth_utils.sign_out()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(metrics, shim, elapsed, args):
+    total_ops = sum(len(values) for values in metrics.latencies.values())
+    turns = len(metrics.latencies.get("ask_query", []))
+    print(f"\n{args.users} users, {args.sessions} sessions x {args.turns} turns each, "
+          f"chain latency {args.chain_latency}s")
+    print(f"Wall time: {elapsed:.2f}s | {total_ops / elapsed:.1f} ops/s | {turns / elapsed:.2f} chat turns/s\n")
+    print(f"{'operation':<16}{'count':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for operation, values in sorted(metrics.latencies.items()):
+        if not values:
+            continue
+        ms = [value * 1000 for value in values]
+        print(f"{operation:<16}{len(ms):>7}{statistics.mean(ms):>10.1f}{percentile(ms, 50):>10.1f}"
+              f"{percentile(ms, 95):>10.1f}{percentile(ms, 99):>10.1f}{max(ms):>10.1f}")
+
+    locked = sum("database is locked" in message for message in shim.errors)
+    locked += sum(count for error, count in metrics.exceptions.items() if "database is locked" in error)
+    print(f"\n'database is locked' errors: {locked}")
+    print(f"Errors reported via st.error: {len(shim.errors)}")
+    for error, count in sorted(metrics.exceptions.items()):
+        print(f"Exception x{count}: {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="number of simultaneous users")
+    parser.add_argument("--sessions", type=int, default=2, help="chat sessions per user")
+    parser.add_argument("--turns", type=int, default=4, help="chat turns per session")
+    parser.add_argument("--chain-latency", type=float, default=0.2, help="mean fake chain latency in seconds")
+    parser.add_argument("--db", help="SQLite file to use (default: a temporary file)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(prefix="legal_chatbot_load_"), "users.db")
+    auth_utils.DB_PATH = db_path
+    shim = StreamlitShim()
+    auth_utils.st = shim
+    auth_utils.init_db()
+    print(f"Using database {db_path}")
+
+    chain = FakeChain(args.chain_latency)
+    metrics = Metrics()
+    start_barrier = threading.Barrier(args.users + 1)
+    threads = [
+        threading.Thread(target=simulate_user, args=(n, args, chain, metrics, shim, start_barrier))
+        for n in range(args.users)
+    ]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    report(metrics, shim, time.perf_counter() - started, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Salted scrypt password hashing, run in a bounded worker pool.
+
+Hashes are stored as `scrypt$<n>$<r>$<p>$<salt b64>$<key b64>`. Rows written
+before this module existed hold an unsalted SHA-256 hex digest; those still
+verify, and are flagged for rehashing so sign-in can upgrade them.
+
+scrypt parameters default to n=2**14, r=8, p=1 and can be tuned per host:
+    python password_hashing.py --target-ms 100
+benchmarks this machine and writes the chosen parameters to kdf_params.json.
+"""
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+KDF_PARAMS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "kdf_params.json")
+DEFAULT_PARAMS = {"n": 2 ** 14, "r": 8, "p": 1}
+# Host tuning may raise n but never below this floor
+MIN_N = 2 ** 14
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# hashlib.scrypt releases the GIL, so workers hash in parallel; bounding the
+# pool caps CPU and memory (128 * r * n bytes per hash) during sign-in spikes.
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+HASH_TIMEOUT = 10.0
+# Jobs admitted at once (running plus queued); beyond this, callers fail fast
+# instead of queueing behind work that would outlast their timeout.
+HASH_MAX_PENDING = HASH_WORKERS * 4
+
+_executor = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="password-hash")
+_admissions = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+
+def _run(fn, *args):
+    """
+    Runs fn on the worker pool and waits up to HASH_TIMEOUT. Raises
+    TimeoutError when the pool is full or the job times out; a timed-out job
+    is cancelled if it has not started yet.
+    """
+    if not _admissions.acquire(blocking=False):
+        raise TimeoutError("password hashing pool is full")
+    future = _executor.submit(fn, *args)
+    future.add_done_callback(lambda _: _admissions.release())
+    try:
+        return future.result(timeout=HASH_TIMEOUT)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def load_params(path=KDF_PARAMS_PATH):
+    """Returns the host-tuned scrypt parameters, or the defaults."""
+    params = dict(DEFAULT_PARAMS)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            params.update(json.load(f))
+    params["n"] = max(params["n"], MIN_N)
+    return params
+
+
+KDF_PARAMS = load_params()
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p,
+        maxmem=128 * r * (n + p + 2) + (1 << 20), dklen=KEY_BYTES,
+    )
+
+
+def _hash(password, params):
+    salt = os.urandom(SALT_BYTES)
+    key = _scrypt(password, salt, params["n"], params["r"], params["p"])
+    return "$".join([
+        "scrypt", str(params["n"]), str(params["r"]), str(params["p"]),
+        base64.b64encode(salt).decode(), base64.b64encode(key).decode(),
+    ])
+
+
+def _verify(password, stored, params):
+    """Returns (matches, needs_rehash) for a stored hash of either format."""
+    if not stored.startswith("scrypt$"):
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored), True
+    _, n, r, p, salt, key = stored.split("$")
+    n, r, p = int(n), int(r), int(p)
+    candidate = _scrypt(password, base64.b64decode(salt), n, r, p)
+    matches = hmac.compare_digest(candidate, base64.b64decode(key))
+    # Only upgrade: a hash made on a stronger host must not be weakened here
+    weaker = n < params["n"] or r < params["r"] or p < params["p"]
+    return matches, weaker
+
+
+def hash_password(password):
+    """Hashes a password with salted scrypt on the worker pool."""
+    return _run(_hash, password, KDF_PARAMS)
+
+
+def verify_password(password, stored):
+    """
+    Checks a password against a stored hash on the worker pool. Returns
+    (matches, needs_rehash); needs_rehash is True for legacy SHA-256 rows and
+    for scrypt hashes made with weaker parameters than the current ones.
+    Raises ValueError for a malformed scrypt hash and TimeoutError if the
+    pool is full or the job times out.
+    """
+    return _run(_verify, password, stored, KDF_PARAMS)
+
+
+_dummy_hash = None
+
+
+def verify_unknown_user(password):
+    """
+    Spends the same hashing work as a real verification, so a sign-in for an
+    unregistered email takes as long as one with a wrong password.
+    """
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password("unknown-user-placeholder")
+    verify_password(password, _dummy_hash)
+
+
+def benchmark_params(target_ms=100, r=8, p=1, max_n=2 ** 20):
+    """
+    Picks the largest power-of-two n whose hash takes at most target_ms on
+    this host, but never less than MIN_N.
+    """
+    n, chosen = MIN_N, MIN_N
+    while n <= max_n:
+        started = time.perf_counter()
+        _scrypt("benchmark-password", os.urandom(SALT_BYTES), n, r, p)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"n=2**{n.bit_length() - 1}: {elapsed_ms:.1f} ms, {128 * r * n >> 20} MiB")
+        if elapsed_ms > target_ms:
+            break
+        chosen = n
+        n *= 2
+    return {"n": chosen, "r": r, "p": p}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scrypt and save parameters for this host.")
+    parser.add_argument("--target-ms", type=float, default=100, help="maximum time per hash")
+    args = parser.parse_args()
+    params = benchmark_params(args.target_ms)
+    with open(KDF_PARAMS_PATH, "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
+    print(f"Saved {params} to {KDF_PARAMS_PATH}")
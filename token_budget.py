@@ -0,0 +1,99 @@
+import tiktoken
+from langchain.docstore.document import Document
+
+MODEL_NAME = "gpt-3.5-turbo-1106"
+
+# USD per 1K tokens for MODEL_NAME
+PRICE_PER_1K_INPUT = 0.001
+PRICE_PER_1K_OUTPUT = 0.002
+
+# Chat format overhead per message (role markers and separators)
+TOKENS_PER_MESSAGE = 4
+# Rough size of a 2000-character chunk, used to pick k before retrieval
+ESTIMATED_CHUNK_TOKENS = 500
+
+
+class TokenAccountant:
+    """
+    Counts the tokens of every prompt component and keeps each turn within a
+    total prompt budget. Before retrieval it lowers k to what the budget can
+    hold; after retrieval it drops the lowest-ranked chunks, trims the last
+    one that fits partially, and drops the oldest history turns if the
+    history alone would crowd out the context.
+    """
+
+    def __init__(self, system_prompt, budget, model=MODEL_NAME, history_share=0.5, min_chunk_tokens=150):
+        self.encoding = tiktoken.encoding_for_model(model)
+        self.budget = budget
+        self.history_share = history_share
+        self.min_chunk_tokens = min_chunk_tokens
+        self.system_tokens = self.count(system_prompt) + TOKENS_PER_MESSAGE
+
+    def count(self, text):
+        return len(self.encoding.encode(text or ""))
+
+    def _history_tokens(self, chat_history):
+        return [self.count(message.content) + TOKENS_PER_MESSAGE for message in chat_history]
+
+    def _fit_history(self, query, chat_history):
+        """Drops the oldest turns until history fits its share of the free budget."""
+        free = self.budget - self.system_tokens - self.count(query) - TOKENS_PER_MESSAGE
+        limit = max(0, int(free * self.history_share))
+        sizes = self._history_tokens(chat_history)
+        start = 0
+        while start < len(sizes) and sum(sizes[start:]) > limit:
+            start += 1
+        return chat_history[start:], sum(sizes[start:]), free
+
+    def plan_k(self, query, chat_history, k):
+        """Returns the largest k (up to the requested one) the budget can hold."""
+        _, history_tokens, free = self._fit_history(query, chat_history)
+        return max(0, min(k, (free - history_tokens) // ESTIMATED_CHUNK_TOKENS))
+
+    def fit(self, query, chat_history, docs):
+        """
+        Returns (docs, chat_history, report) trimmed to the budget. Documents
+        are assumed to be in rank order.
+        """
+        history, history_tokens, free = self._fit_history(query, chat_history)
+        remaining = free - history_tokens
+        kept, context_tokens = [], 0
+        for doc in docs:
+            tokens = self.encoding.encode(doc.page_content)
+            # Documents are joined with a blank line in the stuffed prompt
+            cost = len(tokens) + 1
+            if cost <= remaining:
+                kept.append(doc)
+            elif remaining >= self.min_chunk_tokens:
+                trimmed = self.encoding.decode(tokens[:remaining - 1])
+                kept.append(Document(page_content=trimmed, metadata={**doc.metadata, "trimmed": True}))
+                cost = remaining
+            else:
+                break
+            remaining -= cost
+            context_tokens += cost
+
+        query_tokens = self.count(query) + TOKENS_PER_MESSAGE
+        report = {
+            "system": self.system_tokens,
+            "history": history_tokens,
+            "context": context_tokens,
+            "query": query_tokens,
+            "total": self.system_tokens + history_tokens + context_tokens + query_tokens,
+            "budget": self.budget,
+            "docs_kept": len(kept),
+            "docs_dropped": len(docs) - len(kept),
+            "history_dropped": len(chat_history) - len(history),
+        }
+        return kept, history, report
+
+    def log_turn(self, report, answer):
+        """Prints the per-turn token breakdown and its cost."""
+        output_tokens = self.count(answer)
+        cost = report["total"] / 1000 * PRICE_PER_1K_INPUT + output_tokens / 1000 * PRICE_PER_1K_OUTPUT
+        print(
+            f"Tokens: system={report['system']} history={report['history']} context={report['context']} "
+            f"query={report['query']} total={report['total']}/{report['budget']} output={output_tokens} | "
+            f"docs kept={report['docs_kept']} dropped={report['docs_dropped']} "
+            f"history dropped={report['history_dropped']} | cost=${cost:.5f}"
+        )
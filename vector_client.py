@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import urllib3
+
+# HTTP statuses worth retrying: timeouts, throttling and server-side failures
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def is_transient(error):
+    """Returns True if a failed vector store call is worth retrying."""
+    if isinstance(error, (ConnectionError, TimeoutError, urllib3.exceptions.HTTPError)):
+        return True
+    return getattr(error, "status", None) in TRANSIENT_STATUS_CODES
+
+
+class VectorStoreClient:
+    """
+    Wraps a Pinecone index (or any object with the same upsert/query/update
+    methods, such as FakeVectorIndex) with bounded parallel upserts,
+    exponential-backoff retries and per-call timeouts.
+    """
+
+    def __init__(self, index, max_workers=4, max_retries=5, base_delay=0.5,
+                 max_delay=8.0, timeout=30.0, sleep=time.sleep):
+        self.index = index
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.sleep = sleep
+        self.retries = 0
+        self._retries_lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, api_key, index_name, pool_size=8, **kwargs):
+        """Opens a pooled connection to a Pinecone index, reused across calls."""
+        from pinecone import Pinecone
+
+        pc = Pinecone(api_key=api_key, pool_threads=pool_size)
+        index = pc.Index(index_name, pool_threads=pool_size, connection_pool_maxsize=pool_size)
+        return cls(index, max_workers=pool_size, **kwargs)
+
+    def _backoff(self, attempt):
+        """Full-jitter exponential backoff delay for the given retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _call(self, method, timeout=None, **kwargs):
+        """Calls an index method, retrying transient errors with backoff."""
+        kwargs["_request_timeout"] = timeout or self.timeout
+        for attempt in range(self.max_retries + 1):
+            try:
+                return getattr(self.index, method)(**kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient(e):
+                    raise
+                with self._retries_lock:
+                    self.retries += 1
+                delay = self._backoff(attempt)
+                print(f"Vector store {method} failed ({e}); retrying in {delay:.2f}s")
+                self.sleep(delay)
+
+    def upsert(self, vectors, namespace=None, timeout=None):
+        """Upserts one batch of {"id", "values", "metadata"} dicts."""
+        return self._call("upsert", vectors=vectors, namespace=namespace, timeout=timeout)
+
+    def upsert_batches(self, batches, namespace=None, timeout=None):
+        """
+        Upserts batches in parallel with at most `max_workers` in flight.
+        Batches are pulled from the iterable only as workers free up, so a
+        lazy producer is never read ahead. Returns the number of vectors stored.
+        """
+        stored = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = set()
+            for batch in batches:
+                if len(pending) >= self.max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    stored += sum(future.result() for future in done)
+                pending.add(executor.submit(self._upsert_counted, batch, namespace, timeout))
+            stored += sum(future.result() for future in wait(pending).done)
+        return stored
+
+    def _upsert_counted(self, batch, namespace, timeout):
+        self.upsert(batch, namespace=namespace, timeout=timeout)
+        return len(batch)
+
+    def query(self, vector, top_k=10, filter=None, namespace=None,
+              include_metadata=True, include_values=False, timeout=None):
+        """Runs a similarity query and returns the list of matches."""
+        response = self._call(
+            "query",
+            vector=vector,
+            top_k=top_k,
+            filter=filter,
+            namespace=namespace,
+            include_metadata=include_metadata,
+            include_values=include_values,
+            timeout=timeout,
+        )
+        return response.matches
+
+    def delete(self, ids, namespace=None, timeout=None):
+        """Deletes vectors by ID; unknown IDs are ignored."""
+        return self._call("delete", ids=list(ids), namespace=namespace, timeout=timeout)
+
+    def update_metadata(self, vector_id, metadata, namespace=None, timeout=None):
+        """Merges metadata fields into an existing vector."""
+        return self._call("update", id=vector_id, set_metadata=metadata,
+                          namespace=namespace, timeout=timeout)
+
+    def describe_index_stats(self, timeout=None):
+        return self._call("describe_index_stats", timeout=timeout)
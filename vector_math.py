@@ -0,0 +1,8 @@
+import math
+
+
+def cosine(a, b):
+    """Cosine similarity of two equal-length vectors; 0.0 if either is all zeros."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0